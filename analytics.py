@@ -7,9 +7,12 @@ This module can be extended to work with real Instagram data.
 
 import pandas as pd
 import numpy as np
+import json
+import os
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional, Tuple
 import logging
+from contextlib import contextmanager
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -27,6 +30,7 @@ class InstagramAnalytics:
     def __init__(self):
         """Initialize the analytics engine."""
         self.data_cache = {}
+        self._report_depth = 0
         
     def calculate_engagement_rate(self, likes: int, comments: int, followers: int) -> float:
         """
@@ -47,6 +51,77 @@ class InstagramAnalytics:
         engagement_rate = (total_engagement / followers) * 100
         return round(engagement_rate, 2)
     
+    def calculate_engagement_rate_batch(self, likes, comments, followers) -> np.ndarray:
+        """
+        Calculate engagement rates for many posts or profiles at once.
+        
+        Args:
+            likes (array-like): Number of likes
+            comments (array-like): Number of comments
+            followers (array-like): Number of followers
+            
+        Returns:
+            np.ndarray: Engagement rates as percentages (0.0 where followers is 0)
+        """
+        likes = np.asarray(likes, dtype=np.float64)
+        comments = np.asarray(comments, dtype=np.float64)
+        followers = np.asarray(followers, dtype=np.float64)
+        
+        total_engagement = likes + comments
+        engagement_rate = np.divide(
+            total_engagement * 100, followers,
+            out=np.zeros_like(total_engagement), where=followers != 0
+        )
+        return np.round(engagement_rate, 2)
+    
+    @contextmanager
+    def _report_scope(self):
+        """
+        Memoize derived frames in data_cache for the duration of one report.
+        
+        Outside a report every call recomputes, so frames changed in place between
+        calls are never served stale, and the cache is emptied when the outermost
+        report returns instead of pinning every input it has seen.
+        """
+        self._report_depth += 1
+        try:
+            yield
+        finally:
+            self._report_depth -= 1
+            if self._report_depth == 0:
+                self.data_cache.clear()
+    
+    def _prepare(self, posts_df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Derive the columns shared by the analyze_* methods.
+        
+        Works on a copy, so the caller's DataFrame is never modified. Within one
+        report (see _report_scope) the result is memoized per DataFrame.
+        
+        Args:
+            posts_df (pd.DataFrame): DataFrame with posts data
+            
+        Returns:
+            pd.DataFrame: Shallow copy of posts_df with engagement and a
+            categorical content_type where the source data allows
+        """
+        key = ('prepared', id(posts_df))
+        cached = self.data_cache.get(key)
+        if cached is not None and cached[0] is posts_df:
+            return cached[1]
+        
+        # Columns are only added or replaced, so a shallow copy keeps the caller's frame intact
+        df = posts_df.copy(deep=False)
+        if 'engagement' not in df.columns and {'likes', 'comments'} <= set(df.columns):
+            df['engagement'] = df['likes'].astype('int64') + df['comments'].astype('int64')
+        if 'content_type' in df.columns and not isinstance(df['content_type'].dtype, pd.CategoricalDtype):
+            df['content_type'] = df['content_type'].astype('category')
+        
+        # Keep a reference to the source frame so its id cannot be reused while cached
+        if self._report_depth:
+            self.data_cache[key] = (posts_df, df)
+        return df
+    
     def analyze_posting_patterns(self, posts_df: pd.DataFrame) -> Dict:
         """
         Analyze posting patterns and optimal timing.
@@ -60,28 +135,32 @@ class InstagramAnalytics:
         if posts_df.empty:
             return {}
         
-        # Convert date column if needed
-        if 'date' in posts_df.columns:
-            posts_df['date'] = pd.to_datetime(posts_df['date'])
-            posts_df['day_of_week'] = posts_df['date'].dt.day_name()
-            posts_df['hour'] = posts_df['date'].dt.hour
+        posts_df = self._prepare(posts_df)
         
         # Analyze posting frequency by day
-        daily_posts = posts_df.groupby('day_of_week').size().to_dict()
+        if 'date' in posts_df.columns:
+            try:
+                dates = pd.to_datetime(posts_df['date'], format='ISO8601', cache=True)
+            except (ValueError, TypeError):
+                # Not ISO 8601 (e.g. '01/02/2024'); let pandas infer the format
+                dates = pd.to_datetime(posts_df['date'])
+            posts_df['day_of_week'] = dates.dt.day_name()
+            posts_df['hour'] = dates.dt.hour
+        daily_series = posts_df.groupby('day_of_week', sort=False, observed=True).size()
         
         # Analyze engagement by posting time
         if 'posted_time' in posts_df.columns:
-            time_engagement = posts_df.groupby('posted_time')['engagement'].mean().to_dict()
+            time_series = posts_df.groupby('posted_time', sort=False, observed=True)['engagement'].mean()
         else:
-            time_engagement = {}
+            time_series = pd.Series(dtype=np.float64)
         
         # Find optimal posting times
-        best_day = max(daily_posts.items(), key=lambda x: x[1])[0] if daily_posts else None
-        best_time = max(time_engagement.items(), key=lambda x: x[1])[0] if time_engagement else None
+        best_day = daily_series.idxmax() if len(daily_series) else None
+        best_time = time_series.idxmax() if len(time_series) else None
         
         return {
-            'daily_distribution': daily_posts,
-            'time_engagement': time_engagement,
+            'daily_distribution': daily_series.to_dict(),
+            'time_engagement': time_series.to_dict(),
             'optimal_day': best_day,
             'optimal_time': best_time,
             'total_posts': len(posts_df),
@@ -101,16 +180,19 @@ class InstagramAnalytics:
         if posts_df.empty or 'content_type' not in posts_df.columns:
             return {}
         
+        posts_df = self._prepare(posts_df)
+        
         # Content type distribution
         content_dist = posts_df['content_type'].value_counts().to_dict()
         
-        # Average engagement by content type
-        content_engagement = posts_df.groupby('content_type')['engagement'].agg([
+        # Average engagement by content type, grouped on categorical codes
+        content_stats = posts_df.groupby('content_type', sort=False, observed=True)['engagement'].agg([
             'mean', 'median', 'std'
-        ]).round(2).to_dict()
+        ])
+        content_engagement = content_stats.round(2).to_dict()
         
         # Best performing content type
-        best_content = posts_df.groupby('content_type')['engagement'].mean().idxmax()
+        best_content = content_stats['mean'].idxmax()
         
         return {
             'distribution': content_dist,
@@ -132,38 +214,80 @@ class InstagramAnalytics:
         if posts_df.empty:
             return {}
         
-        hashtag_data = []
-        
-        # Extract hashtags from posts if available
-        if 'hashtags' in posts_df.columns:
-            for _, row in posts_df.iterrows():
-                if isinstance(row['hashtags'], list):
-                    for hashtag in row['hashtags']:
-                        hashtag_data.append({
-                            'hashtag': hashtag,
-                            'engagement': row.get('engagement', 0),
-                            'likes': row.get('likes', 0),
-                            'comments': row.get('comments', 0)
-                        })
-        
-        if not hashtag_data:
+        if 'hashtags' not in posts_df.columns:
             return {}
         
-        hashtag_df = pd.DataFrame(hashtag_data)
+        posts_df = self._prepare(posts_df)
+        
+        # Only list values are hashtags (e.g. not the strings a CSV round trip leaves behind);
+        # Arrow list columns hold nothing else
+        hashtag_cols = posts_df.reindex(columns=['hashtags', 'engagement', 'likes', 'comments'], fill_value=0)
+        hashtags = hashtag_cols['hashtags']
+        if not (isinstance(hashtags.dtype, pd.ArrowDtype) and hashtags.dtype.type is list):
+            hashtag_cols['hashtags'] = hashtags.where(hashtags.map(pd.api.types.is_list_like))
+        
+        # Flatten hashtag lists into one row per (post, hashtag)
+        hashtag_df = (
+            hashtag_cols
+            .explode('hashtags')
+            .rename(columns={'hashtags': 'hashtag'})
+            .dropna(subset=['hashtag'])
+        )
+        
+        if hashtag_df.empty:
+            return {}
         
         # Top hashtags by usage frequency
         top_hashtags = hashtag_df['hashtag'].value_counts().head(20).to_dict()
         
         # Average engagement per hashtag
-        hashtag_engagement = hashtag_df.groupby('hashtag')['engagement'].mean().sort_values(ascending=False).head(20).to_dict()
+        hashtag_engagement = hashtag_df.groupby('hashtag', sort=False, observed=True)['engagement'].mean().nlargest(20).to_dict()
         
         return {
             'top_by_frequency': top_hashtags,
             'top_by_engagement': hashtag_engagement,
-            'total_unique_hashtags': len(hashtag_df['hashtag'].unique()),
+            'total_unique_hashtags': hashtag_df['hashtag'].nunique(),
             'avg_hashtags_per_post': len(hashtag_df) / len(posts_df) if len(posts_df) > 0 else 0
         }
     
+    def _to_columnar(self, profiles_data: Dict) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Convert per-competitor profile data into two columnar DataFrames.
+        
+        Within one report (see _report_scope) the result is cached per
+        profiles_data so that several report methods share one conversion.
+        
+        Args:
+            profiles_data (Dict): Dictionary with profile data for each competitor
+            
+        Returns:
+            Tuple[pd.DataFrame, pd.DataFrame]: Profiles indexed by username and
+            all posts in one frame with a 'username' column
+        """
+        key = ('columnar', id(profiles_data))
+        cached = self.data_cache.get(key)
+        if cached is not None and cached[0] is profiles_data:
+            return cached[1]
+        
+        profiles_df = pd.DataFrame.from_dict(
+            {username: data.get('profile', {}) for username, data in profiles_data.items()},
+            orient='index'
+        ).reindex(index=list(profiles_data)).rename_axis('username')
+        
+        posts_frames = [
+            data['posts'].assign(username=username)
+            for username, data in profiles_data.items()
+            if not data.get('posts', pd.DataFrame()).empty
+        ]
+        if posts_frames:
+            posts_df = pd.concat(posts_frames, ignore_index=True)
+        else:
+            posts_df = pd.DataFrame(columns=['username'])
+        
+        if self._report_depth:
+            self.data_cache[key] = (profiles_data, (profiles_df, posts_df))
+        return profiles_df, posts_df
+    
     def calculate_competitor_metrics(self, profiles_data: Dict) -> pd.DataFrame:
         """
         Calculate comprehensive competitor metrics.
@@ -174,53 +298,71 @@ class InstagramAnalytics:
         Returns:
             pd.DataFrame: Comprehensive metrics comparison
         """
-        metrics = []
+        profiles_df, posts_df = self._to_columnar(profiles_data)
         
-        for username, data in profiles_data.items():
-            profile = data.get('profile', {})
-            posts_df = data.get('posts', pd.DataFrame())
-            
-            if posts_df.empty:
-                continue
-            
-            # Basic metrics
-            followers = profile.get('followers', 0)
-            following = profile.get('following', 0)
-            posts_count = profile.get('posts_count', 0)
-            
-            # Engagement metrics
-            avg_likes = posts_df['likes'].mean() if 'likes' in posts_df.columns else 0
-            avg_comments = posts_df['comments'].mean() if 'comments' in posts_df.columns else 0
-            avg_engagement = posts_df['engagement'].mean() if 'engagement' in posts_df.columns else 0
-            
-            # Engagement rate
-            engagement_rate = self.calculate_engagement_rate(
-                int(avg_likes), int(avg_comments), followers
-            )
-            
-            # Growth indicators (mock calculation)
-            follower_to_following_ratio = followers / following if following > 0 else 0
-            posts_to_followers_ratio = posts_count / followers if followers > 0 else 0
-            
-            # Content frequency
-            posting_patterns = self.analyze_posting_patterns(posts_df)
-            
-            metrics.append({
-                'username': username,
-                'followers': followers,
-                'following': following,
-                'posts_count': posts_count,
-                'avg_likes': round(avg_likes, 2),
-                'avg_comments': round(avg_comments, 2),
-                'avg_engagement': round(avg_engagement, 2),
-                'engagement_rate': engagement_rate,
-                'follower_following_ratio': round(follower_to_following_ratio, 2),
-                'posts_followers_ratio': round(posts_to_followers_ratio * 1000, 2),  # per 1000 followers
-                'posts_per_week': round(posting_patterns.get('avg_posts_per_day', 0) * 7, 2),
-                'verified': profile.get('verified', False)
-            })
-        
-        return pd.DataFrame(metrics)
+        # Only competitors with scraped posts are compared
+        if posts_df.empty:
+            return pd.DataFrame()
+        
+        # Engagement metrics for every competitor in a single groupby
+        engagement_cols = posts_df.reindex(columns=['likes', 'comments', 'engagement'], fill_value=0)
+        agg = engagement_cols.groupby(posts_df['username'], sort=False, observed=True).agg(
+            avg_likes=('likes', 'mean'),
+            avg_comments=('comments', 'mean'),
+            avg_engagement=('engagement', 'mean'),
+            n_posts=('likes', 'size')
+        )
+        
+        # Basic metrics
+        profiles_df = profiles_df.reindex(
+            index=agg.index, columns=['followers', 'following', 'posts_count', 'verified']
+        )
+        profiles_df = profiles_df.fillna(
+            {'followers': 0, 'following': 0, 'posts_count': 0, 'verified': False}
+        ).astype({'followers': 'int64', 'following': 'int64', 'posts_count': 'int64', 'verified': bool})
+        
+        followers = profiles_df['followers']
+        following = profiles_df['following']
+        
+        # Engagement rate (whole likes/comments per post, as in calculate_engagement_rate)
+        engagement_rate = pd.Series(
+            self.calculate_engagement_rate_batch(
+                np.trunc(agg['avg_likes'].to_numpy()),
+                np.trunc(agg['avg_comments'].to_numpy()),
+                followers.to_numpy()
+            ),
+            index=agg.index
+        )
+        
+        # Growth indicators (mock calculation)
+        follower_to_following_ratio = (followers / following.where(following > 0)).fillna(0.0)
+        posts_to_followers_ratio = (profiles_df['posts_count'] / followers.where(followers > 0)).fillna(0.0)
+        
+        # Content frequency: posts per day over a week, scaled back to a week
+        avg_posts_per_day = agg['n_posts'] / 7.0
+        
+        metrics_df = pd.DataFrame({
+            'followers': followers,
+            'following': following,
+            'posts_count': profiles_df['posts_count'],
+            'avg_likes': agg['avg_likes'],
+            'avg_comments': agg['avg_comments'],
+            'avg_engagement': agg['avg_engagement'],
+            'engagement_rate': engagement_rate,
+            'follower_following_ratio': follower_to_following_ratio,
+            'posts_followers_ratio': posts_to_followers_ratio * 1000,  # per 1000 followers
+            'posts_per_week': avg_posts_per_day * 7,
+            'verified': profiles_df['verified']
+        })
+        
+        # Round all float metrics in one pass
+        float_cols = [
+            'avg_likes', 'avg_comments', 'avg_engagement', 'engagement_rate',
+            'follower_following_ratio', 'posts_followers_ratio', 'posts_per_week'
+        ]
+        metrics_df[float_cols] = metrics_df[float_cols].round(2)
+        
+        return metrics_df.rename_axis('username').reset_index()
     
     def generate_insights(self, profiles_data: Dict) -> Dict:
         """
@@ -235,39 +377,32 @@ class InstagramAnalytics:
         if not profiles_data:
             return {}
         
-        metrics_df = self.calculate_competitor_metrics(profiles_data)
-        
-        if metrics_df.empty:
-            return {}
+        with self._report_scope():
+            metrics_df = self.calculate_competitor_metrics(profiles_data)
+            
+            if metrics_df.empty:
+                return {}
+            
+            # Content analysis across all competitors, reusing the combined posts from the metrics
+            _, posts_df = self._to_columnar(profiles_data)
+            content_analysis = self.analyze_content_performance(posts_df)
         
-        # Top performers
-        top_engagement = metrics_df.loc[metrics_df['engagement_rate'].idxmax()]
-        top_followers = metrics_df.loc[metrics_df['followers'].idxmax()]
-        most_active = metrics_df.loc[metrics_df['posts_per_week'].idxmax()]
+        # Leaders and averages for engagement rate, followers and posting frequency in one pass
+        leader_values = metrics_df[['engagement_rate', 'followers', 'posts_per_week']].to_numpy(dtype=np.float64)
+        leader_idx = leader_values.argmax(axis=0)
+        leader_usernames = metrics_df['username'].to_numpy()[leader_idx]
+        top_values = leader_values[leader_idx, np.arange(leader_values.shape[1])]
         
         # Industry benchmarks (calculated from the dataset)
-        avg_engagement_rate = metrics_df['engagement_rate'].mean()
-        avg_followers = metrics_df['followers'].mean()
-        avg_posting_frequency = metrics_df['posts_per_week'].mean()
-        
-        # Content analysis across all competitors
-        all_posts = []
-        for data in profiles_data.values():
-            if not data.get('posts', pd.DataFrame()).empty:
-                all_posts.append(data['posts'])
-        
-        if all_posts:
-            combined_posts = pd.concat(all_posts, ignore_index=True)
-            content_analysis = self.analyze_content_performance(combined_posts)
-            best_content_type = content_analysis.get('best_performing', 'Unknown')
-        else:
-            best_content_type = 'Unknown'
+        avg_engagement_rate, avg_followers, avg_posting_frequency = leader_values.mean(axis=0)
+        
+        best_content_type = content_analysis.get('best_performing', 'Unknown')
         
         insights = {
             'top_performers': {
-                'highest_engagement': top_engagement['username'],
-                'most_followers': top_followers['username'],
-                'most_active': most_active['username']
+                'highest_engagement': leader_usernames[0],
+                'most_followers': leader_usernames[1],
+                'most_active': leader_usernames[2]
             },
             'benchmarks': {
                 'avg_engagement_rate': round(avg_engagement_rate, 2),
@@ -280,50 +415,81 @@ class InstagramAnalytics:
                 'recommended_posting_frequency': f"{round(avg_posting_frequency * 1.1, 1)} posts per week"
             },
             'competitive_gaps': {
-                'engagement_leader_advantage': round(top_engagement['engagement_rate'] - avg_engagement_rate, 2),
-                'follower_leader_advantage': int(top_followers['followers'] - avg_followers),
-                'activity_leader_advantage': round(most_active['posts_per_week'] - avg_posting_frequency, 2)
+                'engagement_leader_advantage': round(top_values[0] - avg_engagement_rate, 2),
+                'follower_leader_advantage': int(top_values[1] - avg_followers),
+                'activity_leader_advantage': round(top_values[2] - avg_posting_frequency, 2)
             }
         }
         
         return insights
     
-    def export_analysis_report(self, profiles_data: Dict, filename: str = None) -> str:
+    def export_analysis_report(self, profiles_data: Dict, filename: str = None,
+                               format: Optional[str] = None) -> str:
         """
         Export comprehensive analysis report.
         
         Args:
             profiles_data (Dict): Dictionary with profile data for each competitor
             filename (str): Optional custom filename
+            format (str): 'parquet' for a directory with metrics.parquet,
+                posts.parquet and insights.json, or 'excel' for one .xlsx workbook.
+                Defaults to 'excel' for a filename ending in .xlsx, else 'parquet'.
             
         Returns:
-            str: Path to exported file
+            str: Path to exported file or directory
         """
+        is_xlsx = filename is not None and filename.lower().endswith('.xlsx')
+        if format is None:
+            format = 'excel' if is_xlsx else 'parquet'
+        if format not in ('parquet', 'excel'):
+            raise ValueError(f"Unsupported export format: {format}")
+        if is_xlsx and format != 'excel':
+            raise ValueError(f"Filename {filename} does not match export format: {format}")
+        
         if filename is None:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"instagram_competitor_analysis_{timestamp}.xlsx"
+            filename = f"instagram_competitor_analysis_{timestamp}"
+            if format == 'excel':
+                filename += '.xlsx'
         
         try:
-            with pd.ExcelWriter(filename, engine='openpyxl') as writer:
-                # Metrics comparison
+            with self._report_scope():
                 metrics_df = self.calculate_competitor_metrics(profiles_data)
-                metrics_df.to_excel(writer, sheet_name='Competitor_Metrics', index=False)
+                insights = self.generate_insights(profiles_data)
+                _, posts_df = self._to_columnar(profiles_data)
+            
+            if format == 'parquet':
+                os.makedirs(filename, exist_ok=True)
                 
-                # Individual profile data
-                for username, data in profiles_data.items():
-                    if not data.get('posts', pd.DataFrame()).empty:
-                        posts_df = data['posts']
-                        sheet_name = f"{username}_Posts"[:31]  # Excel sheet name limit
-                        posts_df.to_excel(writer, sheet_name=sheet_name, index=False)
+                # Metrics comparison and all posts with a username column
+                metrics_df.to_parquet(os.path.join(filename, 'metrics.parquet'), index=False)
+                posts_df.to_parquet(os.path.join(filename, 'posts.parquet'), index=False)
                 
                 # Insights summary
-                insights = self.generate_insights(profiles_data)
-                insights_df = pd.DataFrame([insights])
-                insights_df.to_excel(writer, sheet_name='Insights', index=False)
+                with open(os.path.join(filename, 'insights.json'), 'w', encoding='utf-8') as f:
+                    json.dump(insights, f, indent=2, default=str)
+            else:
+                with pd.ExcelWriter(
+                    filename, engine='xlsxwriter',
+                    engine_kwargs={'options': {'strings_to_formulas': False, 'strings_to_urls': False}}
+                ) as writer:
+                    # Metrics comparison
+                    metrics_df.to_excel(writer, sheet_name='Competitor_Metrics', index=False)
+                    
+                    # Individual profile data
+                    for username, data in profiles_data.items():
+                        if not data.get('posts', pd.DataFrame()).empty:
+                            posts_df = data['posts']
+                            sheet_name = f"{username}_Posts"[:31]  # Excel sheet name limit
+                            posts_df.to_excel(writer, sheet_name=sheet_name, index=False)
+                    
+                    # Insights summary
+                    insights_df = pd.DataFrame([insights])
+                    insights_df.to_excel(writer, sheet_name='Insights', index=False)
             
             logger.info(f"Analysis report exported to {filename}")
             return filename
             
         except Exception as e:
             logger.error(f"Failed to export analysis report: {str(e)}")
-            raise
\ No newline at end of file
+            raise
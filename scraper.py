@@ -7,14 +7,19 @@ CSV support, and mechanisms for handling rate limiting.
 
 import snscrape.modules.instagram as sninstagram
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import operator
+import re
 import time
 import random
+import threading
 import csv
 import os
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import logging
-from typing import List, Dict, Optional
-import json
+from typing import List, Dict, Optional, Union
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # Configure logging
 logging.basicConfig(
@@ -27,50 +32,92 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+_HASHTAG_RE = re.compile(r'#\w+')
+
+# Post attributes that must be present and not None for a post to be kept
+_REQUIRED_POST_FIELDS = operator.attrgetter('date', 'content', 'likeCount', 'commentCount')
+
+# Number of posts snscrape requests per page from Instagram
+_POSTS_PER_PAGE = 50
+
+# Fields collected for every scraped post, in column order
+_POST_FIELDS = ('username', 'date', 'content', 'likes', 'comments', 'url', 'scraped_at', 'engagement')
+
+# Fixed schema so every streamed batch matches, even when a profile has no hashtags
+_POSTS_SCHEMA = pa.schema([
+    ('username', pa.dictionary(pa.int32(), pa.string())),
+    ('date', pa.string()),
+    ('content', pa.string()),
+    ('likes', pa.int32()),
+    ('comments', pa.int32()),
+    ('hashtags', pa.list_(pa.string())),
+    ('url', pa.string()),
+    ('scraped_at', pa.string()),
+    ('engagement', pa.int32())
+])
+
+# Compact in-memory dtypes: counts fit in int32, usernames repeat on every post and
+# hashtags stay in contiguous Arrow list buffers rather than Python lists
+_HASHTAGS_DTYPE = pd.ArrowDtype(pa.list_(pa.string()))
+_POST_DTYPES = {
+    'likes': 'int32', 'comments': 'int32', 'engagement': 'int32',
+    'username': 'category', 'hashtags': _HASHTAGS_DTYPE
+}
+
 class InstagramScraper:
     """Enhanced Instagram scraper with robust error handling and data validation."""
     
-    def __init__(self, delay_range=(1, 3), max_retries=3):
+    def __init__(self, delay_range=(1, 3), max_retries=3, max_workers=4):
         """
         Initialize the Instagram scraper.
         
         Args:
             delay_range (tuple): Range for random delays between requests
             max_retries (int): Maximum number of retries for failed requests
+            max_workers (int): Maximum number of profiles scraped concurrently
         """
         self.delay_range = delay_range
         self.max_retries = max_retries
+        self.max_workers = max_workers
         self.scraped_data = []
         
+        # Rate limiter shared by all worker threads
+        self._rate_lock = threading.Lock()
+        self._next_request_at = 0.0
+        
     def add_delay(self):
-        """Add random delay to avoid rate limiting."""
-        delay = random.uniform(*self.delay_range)
-        logger.info(f"Adding delay of {delay:.2f} seconds")
-        time.sleep(delay)
+        """Wait for the shared rate limiter to avoid rate limiting."""
+        with self._rate_lock:
+            now = time.monotonic()
+            start = max(now, self._next_request_at)
+            self._next_request_at = start + random.uniform(*self.delay_range)
+        
+        delay = start - now
+        if delay > 0:
+            logger.info(f"Adding delay of {delay:.2f} seconds")
+            time.sleep(delay)
         
     def validate_post_data(self, post) -> bool:
         """Validate scraped post data."""
-        required_fields = ['date', 'content', 'likeCount', 'commentCount']
-        
-        for field in required_fields:
-            if not hasattr(post, field) or getattr(post, field) is None:
-                logger.warning(f"Missing or invalid field: {field}")
-                return False
-        return True
+        try:
+            values = _REQUIRED_POST_FIELDS(post)
+        except AttributeError:
+            return False
+        return not any(value is None for value in values)
         
     def extract_hashtags(self, content: str) -> List[str]:
         """Extract hashtags from post content."""
         if not content:
             return []
         
-        hashtags = []
-        words = content.split()
-        for word in words:
-            if word.startswith('#') and len(word) > 1:
-                hashtags.append(word.lower())
-        return hashtags
+        return [hashtag.lower() for hashtag in _HASHTAG_RE.findall(content)]
+    
+    @staticmethod
+    def extract_hashtags_series(content: pd.Series) -> pd.Series:
+        """Extract hashtags from a whole column of post content at once."""
+        return content.fillna('').str.findall(_HASHTAG_RE).str.join(' ').str.lower().str.split()
         
-    def scrape_profile(self, username: str, max_posts: int = 50) -> List[Dict]:
+    def scrape_profile(self, username: str, max_posts: int = 50) -> Dict[str, List]:
         """
         Scrape Instagram profile with enhanced error handling.
         
@@ -79,52 +126,60 @@ class InstagramScraper:
             max_posts (int): Maximum number of posts to scrape
             
         Returns:
-            List[Dict]: List of post data dictionaries
+            Dict[str, List]: Post data as one list per field
         """
         logger.info(f"Starting to scrape profile: {username}")
-        posts_data = []
+        posts_data = {field: [] for field in _POST_FIELDS}
         retry_count = 0
         
         while retry_count < self.max_retries:
+            # Start each attempt empty so a retry does not duplicate posts already collected
+            posts_data = {field: [] for field in _POST_FIELDS}
             try:
                 # Initialize the scraper
                 profile_scraper = sninstagram.InstagramUserScraper(username)
                 posts_scraped = 0
                 
-                for post in profile_scraper.get_items():
+                # Wait for the shared rate limiter before the first request
+                self.add_delay()
+                
+                # One timestamp for every post collected in this scrape session
+                scraped_at = datetime.now(timezone.utc).isoformat()
+                
+                for posts_seen, post in enumerate(profile_scraper.get_items(), 1):
                     if posts_scraped >= max_posts:
                         break
                         
                     # Validate post data
-                    if not self.validate_post_data(post):
+                    if self.validate_post_data(post):
+                        # Extract post information before appending, so a failing
+                        # attribute cannot leave the field lists at different lengths
+                        likes = post.likeCount or 0
+                        comments = post.commentCount or 0
+                        values = (
+                            username,
+                            post.date.isoformat() if post.date else None,
+                            post.content or '',
+                            likes,
+                            comments,
+                            post.url or '',
+                            scraped_at,
+                            likes + comments  # Engagement
+                        )
+                        for field, value in zip(_POST_FIELDS, values):
+                            posts_data[field].append(value)
+                        posts_scraped += 1
+                        
+                        if logger.isEnabledFor(logging.DEBUG):
+                            logger.debug(f"Scraped post {posts_scraped}/{max_posts} from {username}")
+                    else:
                         logger.warning(f"Skipping invalid post from {username}")
-                        continue
-                    
-                    # Extract post information
-                    post_data = {
-                        'username': username,
-                        'date': post.date.isoformat() if post.date else None,
-                        'content': post.content or '',
-                        'likes': post.likeCount or 0,
-                        'comments': post.commentCount or 0,
-                        'hashtags': self.extract_hashtags(post.content or ''),
-                        'url': post.url or '',
-                        'scraped_at': datetime.now().isoformat()
-                    }
                     
-                    # Calculate engagement rate
-                    total_engagement = post_data['likes'] + post_data['comments']
-                    post_data['engagement'] = total_engagement
+                    # Throttle only before the scraper fetches its next page of posts
+                    if posts_seen % _POSTS_PER_PAGE == 0:
+                        self.add_delay()
                     
-                    posts_data.append(post_data)
-                    posts_scraped += 1
-                    
-                    logger.info(f"Scraped post {posts_scraped}/{max_posts} from {username}")
-                    
-                    # Add delay between posts
-                    self.add_delay()
-                    
-                logger.info(f"Successfully scraped {len(posts_data)} posts from {username}")
+                logger.info(f"Successfully scraped {len(posts_data['username'])} posts from {username}")
                 return posts_data
                 
             except Exception as e:
@@ -140,44 +195,99 @@ class InstagramScraper:
                     
         return posts_data
         
-    def scrape_multiple_profiles(self, usernames: List[str], max_posts_per_profile: int = 50) -> pd.DataFrame:
+    def _posts_to_frame(self, posts_data: Dict[str, List]) -> pd.DataFrame:
+        """Build a posts DataFrame from per-field lists of scraped posts."""
+        df = pd.DataFrame(posts_data, columns=list(_POST_FIELDS))
+        df.insert(df.columns.get_loc('comments') + 1, 'hashtags',
+                  self.extract_hashtags_series(df['content']))
+        return df.astype(_POST_DTYPES)
+        
+    def scrape_multiple_profiles(self, usernames: List[str], max_posts_per_profile: int = 50,
+                                 parquet_path: Optional[str] = None) -> Union[pd.DataFrame, str]:
         """
         Scrape multiple Instagram profiles.
         
         Args:
             usernames (List[str]): List of Instagram usernames
             max_posts_per_profile (int): Maximum posts per profile
+            parquet_path (str): Optional Parquet file to stream posts into as
+                each profile finishes. Only the profiles still being scraped (up to
+                max_workers) are held in memory, and the file is not read back.
             
         Returns:
-            pd.DataFrame: Combined data from all profiles
+            Union[pd.DataFrame, str]: Combined data from all profiles in request
+            order, or parquet_path when given. The file holds one row group per
+            profile in completion order; load it with read_posts_parquet.
         """
-        all_posts = []
+        posts_by_user = {}
+        writer = pq.ParquetWriter(parquet_path, _POSTS_SCHEMA) if parquet_path is not None else None
+        total_posts = 0
         
-        for i, username in enumerate(usernames, 1):
-            logger.info(f"Processing profile {i}/{len(usernames)}: {username}")
-            
-            try:
-                posts = self.scrape_profile(username, max_posts_per_profile)
-                all_posts.extend(posts)
+        try:
+            # Profiles are scraped concurrently; add_delay keeps the overall request rate bounded
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = {}
+                for i, username in enumerate(usernames, 1):
+                    logger.info(f"Processing profile {i}/{len(usernames)}: {username}")
+                    futures[executor.submit(self.scrape_profile, username, max_posts_per_profile)] = username
                 
-                # Add longer delay between profiles
-                if i < len(usernames):
-                    profile_delay = random.uniform(5, 10)
-                    logger.info(f"Waiting {profile_delay:.2f} seconds before next profile...")
-                    time.sleep(profile_delay)
+                for future in as_completed(futures):
+                    username = futures[future]
+                    try:
+                        posts_data = future.result()
+                    except Exception as e:
+                        logger.error(f"Failed to scrape profile {username}: {str(e)}")
+                        continue
                     
-            except Exception as e:
-                logger.error(f"Failed to scrape profile {username}: {str(e)}")
-                continue
-                
-        if all_posts:
-            df = pd.DataFrame(all_posts)
-            logger.info(f"Total posts scraped: {len(df)}")
-            return df
+                    if not posts_data['username']:
+                        continue
+                    
+                    if parquet_path is None:
+                        posts_by_user[username] = posts_data
+                        continue
+                    
+                    # Write one row group per profile as soon as it completes
+                    total_posts += len(posts_data['username'])
+                    writer.write_table(pa.Table.from_pandas(
+                        self._posts_to_frame(posts_data), schema=_POSTS_SCHEMA, preserve_index=False
+                    ))
+        finally:
+            if writer is not None:
+                writer.close()
+        
+        if writer is not None:
+            logger.info(f"Total posts scraped: {total_posts} (written to {parquet_path})")
+            return parquet_path
+        
+        if posts_by_user:
+            # Merge the per-field lists in the order the profiles were requested
+            merged = {field: [] for field in _POST_FIELDS}
+            for username in usernames:
+                for field, values in posts_by_user.pop(username, {}).items():
+                    merged[field].extend(values)
+            df = self._posts_to_frame(merged)
         else:
             logger.warning("No posts were scraped successfully")
             return pd.DataFrame()
+        
+        logger.info(f"Total posts scraped: {len(df)}")
+        return df
+            
+    @staticmethod
+    def read_posts_parquet(path: str) -> pd.DataFrame:
+        """
+        Load posts written by scrape_multiple_profiles(parquet_path=...).
+        
+        Args:
+            path (str): Parquet file written by the scraper
             
+        Returns:
+            pd.DataFrame: All posts, with the same dtypes as the in-memory result
+        """
+        return pq.read_table(path).to_pandas(
+            types_mapper=lambda arrow_type: _HASHTAGS_DTYPE if pa.types.is_list(arrow_type) else None
+        )
+        
     def save_to_csv(self, data: pd.DataFrame, filename: str = None) -> str:
         """
         Save scraped data to CSV file.
@@ -194,6 +304,10 @@ class InstagramScraper:
             filename = f"instagram_data_{timestamp}.csv"
             
         try:
+            # Write hashtags as Python lists, as before the Arrow list column
+            if 'hashtags' in data.columns and isinstance(data['hashtags'].dtype, pd.ArrowDtype):
+                data = data.assign(hashtags=pd.Series(data['hashtags'].tolist(), index=data.index, dtype=object))
+            
             data.to_csv(filename, index=False, encoding='utf-8')
             logger.info(f"Data saved to {filename}")
             return filename
@@ -225,7 +339,7 @@ class InstagramScraper:
             
     def save_to_json(self, data: pd.DataFrame, filename: str = None) -> str:
         """
-        Save scraped data to JSON file.
+        Save scraped data to a JSON Lines file.
         
         Args:
             data (pd.DataFrame): Data to save
@@ -236,14 +350,11 @@ class InstagramScraper:
         """
         if filename is None:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"instagram_data_{timestamp}.json"
+            filename = f"instagram_data_{timestamp}.jsonl"
             
         try:
-            # Convert DataFrame to JSON
-            data_dict = data.to_dict(orient='records')
-            
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(data_dict, f, indent=2, ensure_ascii=False)
+            # Stream records as JSON Lines, one post per line
+            data.to_json(filename, orient='records', lines=True, force_ascii=False, date_format='iso')
                 
             logger.info(f"Data saved to {filename}")
             return filename
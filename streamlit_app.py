@@ -5,15 +5,23 @@ Interactive web application for Instagram competitor analysis and visualization.
 """
 
 import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-from datetime import datetime, timedelta
+from datetime import datetime
 import numpy as np
-import time
+import random
+import threading
 import json
+import hashlib
 import logging
-from typing import List, Dict, Optional
+import os
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import List, Dict, Optional, Tuple
 
 # Configure page
 st.set_page_config(
@@ -27,6 +35,130 @@ st.set_page_config(
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Fixed categories shared by every generated posts DataFrame
+CONTENT_TYPES = ['photo', 'video', 'carousel', 'reel']
+POSTED_TIMES = ['morning', 'afternoon', 'evening', 'night']
+
+# Process-wide st.cache_data bounds: figures are keyed per analysis run and mock data
+# per free-text handle, so both would otherwise grow with every session and click
+FIGURE_CACHE_ENTRIES = 32
+MOCK_DATA_CACHE_ENTRIES = 256
+
+# Total posts sent to the likes vs comments scatter plot, shared evenly between profiles
+MAX_SCATTER_POINTS = 300
+
+# Generated posts are persisted here so app restarts skip regeneration
+POSTS_CACHE_DIR = Path('.cache')
+
+def _username_seed(username: str) -> int:
+    """Return a 32-bit random seed derived from the username."""
+    return abs(hash(username)) & 0xFFFFFFFF
+
+def _username_rng(username: str) -> np.random.Generator:
+    """Return a private random generator seeded from the username."""
+    return np.random.default_rng(_username_seed(username))
+
+@st.cache_data(show_spinner=False, max_entries=MOCK_DATA_CACHE_ENTRIES)
+def _gen_profile(username: str) -> Dict:
+    """Generate mock profile data for demonstration."""
+    rng = _username_rng(username)  # Consistent data per username
+    
+    followers = rng.integers(10000, 1000000)
+    following = rng.integers(100, 5000)
+    posts_count = rng.integers(50, 2000)
+    
+    return {
+        'username': username,
+        'followers': followers,
+        'following': following,
+        'posts_count': posts_count,
+        'engagement_rate': rng.uniform(1.5, 8.5),
+        'avg_likes': rng.integers(100, 50000),
+        'avg_comments': rng.integers(10, 2000),
+        'verified': rng.choice([True, False], p=[0.2, 0.8])
+    }
+
+def _gen_posts(username: str, num_posts: int = 20) -> pd.DataFrame:
+    """Generate mock posts data for demonstration."""
+    # Post dates are relative to today, so today is part of every cache key
+    return _gen_posts_for_day(username, num_posts, f"{pd.Timestamp.now():%Y%m%d}")
+
+@st.cache_data(show_spinner=False, max_entries=MOCK_DATA_CACHE_ENTRIES)
+def _gen_posts_for_day(username: str, num_posts: int, day: str) -> pd.DataFrame:
+    """Generate mock posts dated up to the given day (YYYYMMDD)."""
+    base_date = pd.Timestamp(day)  # Whole days, as posts are dated per day
+    
+    # The on-disk copy is only valid for the day it was written.
+    # The handle is free text, so it is hashed rather than used as a path component.
+    handle_digest = hashlib.sha256(username.encode('utf-8')).hexdigest()[:16]
+    cache_path = POSTS_CACHE_DIR / f"{handle_digest}_{num_posts}_{day}.feather"
+    if cache_path.exists():
+        return pd.read_feather(cache_path)
+    
+    rng = _username_rng(username)
+    
+    # Draw every column as one vector of length num_posts
+    days = rng.integers(1, 90, num_posts)
+    dates = base_date - pd.to_timedelta(days, unit='D')
+    likes = rng.integers(50, 100000, num_posts)
+    comments = rng.integers(5, 5000, num_posts)
+    # Categorical columns so groupbys run on integer codes
+    content_type = pd.Categorical(
+        rng.choice(CONTENT_TYPES, size=num_posts, p=[0.4, 0.2, 0.3, 0.1]),
+        categories=CONTENT_TYPES
+    )
+    hashtags_count = rng.integers(0, 30, num_posts)
+    posted_time = pd.Categorical(rng.choice(POSTED_TIMES, size=num_posts), categories=POSTED_TIMES)
+    
+    posts_df = pd.DataFrame({
+        'username': np.repeat(username, num_posts),
+        'date': dates,
+        'likes': likes,
+        'comments': comments,
+        'engagement': likes + comments,
+        'content_type': content_type,
+        'hashtags_count': hashtags_count,
+        'posted_time': posted_time
+    })
+    
+    try:
+        POSTS_CACHE_DIR.mkdir(exist_ok=True)
+        # Write then rename so a concurrent reader never sees a partial file
+        tmp_path = cache_path.with_suffix(f'.{os.getpid()}.{threading.get_ident()}.tmp')
+        posts_df.to_feather(tmp_path)
+        os.replace(tmp_path, cache_path)
+        
+        # Drop files written on earlier days, which can no longer be read back
+        for stale_path in POSTS_CACHE_DIR.glob('*.feather'):
+            if not stale_path.stem.endswith(f"_{day}"):
+                stale_path.unlink(missing_ok=True)
+    except OSError as e:
+        logger.warning(f"Could not cache posts for @{username}: {e}")
+    
+    return posts_df
+
+@st.cache_data(show_spinner=False, max_entries=MOCK_DATA_CACHE_ENTRIES)
+def _gen_hashtags(username: str) -> List[str]:
+    """Generate mock trending hashtags."""
+    rng = random.Random(_username_seed(username))
+    
+    base_hashtags = [
+        '#instagram', '#photography', '#love', '#instagood', '#photooftheday',
+        '#fashion', '#beautiful', '#happy', '#cute', '#followme', '#like4like',
+        '#nature', '#art', '#food', '#style', '#amazing', '#beauty', '#fitness',
+        '#travel', '#lifestyle', '#motivation', '#inspiration', '#business'
+    ]
+    
+    return rng.sample(base_hashtags, 10)
+
+def _analyze_one(username: str, num_posts: int) -> Tuple[str, Dict, pd.DataFrame, List[str]]:
+    """Generate the mock profile, posts and hashtags for one username."""
+    profile_data = _gen_profile(username)
+    posts_data = _gen_posts(username, num_posts)
+    hashtags = _gen_hashtags(username)
+    profile_data['avg_engagement'] = posts_data['engagement'].mean()
+    return username, profile_data, posts_data, hashtags
+
 class MockInstagramAnalytics:
     """Mock Instagram analytics for demonstration purposes."""
     
@@ -38,62 +170,16 @@ class MockInstagramAnalytics:
         ]
         
     def generate_mock_profile_data(self, username: str) -> Dict:
-        """Generate mock profile data for demonstration."""
-        np.random.seed(hash(username) % 2**32)  # Consistent data per username
-        
-        followers = np.random.randint(10000, 1000000)
-        following = np.random.randint(100, 5000)
-        posts_count = np.random.randint(50, 2000)
-        
-        return {
-            'username': username,
-            'followers': followers,
-            'following': following,
-            'posts_count': posts_count,
-            'engagement_rate': np.random.uniform(1.5, 8.5),
-            'avg_likes': np.random.randint(100, 50000),
-            'avg_comments': np.random.randint(10, 2000),
-            'verified': np.random.choice([True, False], p=[0.2, 0.8])
-        }
+        """Generate mock profile data for demonstration (cached across reruns)."""
+        return _gen_profile(username)
     
     def generate_mock_posts_data(self, username: str, num_posts: int = 20) -> pd.DataFrame:
-        """Generate mock posts data for demonstration."""
-        np.random.seed(hash(username) % 2**32)
-        
-        posts = []
-        base_date = datetime.now()
-        
-        for i in range(num_posts):
-            post_date = base_date - timedelta(days=np.random.randint(1, 90))
-            likes = np.random.randint(50, 100000)
-            comments = np.random.randint(5, 5000)
-            
-            posts.append({
-                'username': username,
-                'date': post_date.strftime('%Y-%m-%d'),
-                'likes': likes,
-                'comments': comments,
-                'engagement': likes + comments,
-                'content_type': np.random.choice(['photo', 'video', 'carousel', 'reel'], 
-                                               p=[0.4, 0.2, 0.3, 0.1]),
-                'hashtags_count': np.random.randint(0, 30),
-                'posted_time': np.random.choice(['morning', 'afternoon', 'evening', 'night'])
-            })
-        
-        return pd.DataFrame(posts)
+        """Generate mock posts data for demonstration (cached across reruns)."""
+        return _gen_posts(username, num_posts)
     
     def get_trending_hashtags(self, username: str) -> List[str]:
-        """Generate mock trending hashtags."""
-        np.random.seed(hash(username) % 2**32)
-        
-        base_hashtags = [
-            '#instagram', '#photography', '#love', '#instagood', '#photooftheday',
-            '#fashion', '#beautiful', '#happy', '#cute', '#followme', '#like4like',
-            '#nature', '#art', '#food', '#style', '#amazing', '#beauty', '#fitness',
-            '#travel', '#lifestyle', '#motivation', '#inspiration', '#business'
-        ]
-        
-        return np.random.choice(base_hashtags, size=10, replace=False).tolist()
+        """Generate mock trending hashtags (cached across reruns)."""
+        return _gen_hashtags(username)
 
 def main():
     """Main Streamlit application."""
@@ -103,6 +189,8 @@ def main():
         st.session_state.analytics = MockInstagramAnalytics()
     if 'analyzed_profiles' not in st.session_state:
         st.session_state.analyzed_profiles = {}
+    if 'combined_df' not in st.session_state:
+        st.session_state.combined_df = pd.DataFrame()
     
     # Header
     st.title("📊 Instagram Competitor Analytics Tracker")
@@ -140,24 +228,29 @@ def main():
         
         if analyze_btn and selected_competitors:
             with st.spinner("Analyzing Instagram profiles..."):
-                # Simulate analysis time
                 progress_bar = st.progress(0)
-                for i, username in enumerate(selected_competitors):
-                    time.sleep(0.5)  # Simulate processing time
-                    
-                    # Generate mock data
-                    profile_data = st.session_state.analytics.generate_mock_profile_data(username)
-                    posts_data = st.session_state.analytics.generate_mock_posts_data(username, num_posts)
-                    hashtags = st.session_state.analytics.get_trending_hashtags(username)
-                    
-                    st.session_state.analyzed_profiles[username] = {
-                        'profile': profile_data,
-                        'posts': posts_data,
-                        'hashtags': hashtags,
-                        'analyzed_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                    }
+                
+                # Generate mock data for all profiles concurrently; worker threads share
+                # this run's context so the cached generators work from them
+                ctx = get_script_run_ctx()
+                with ThreadPoolExecutor(
+                    max_workers=min(8, len(selected_competitors)),
+                    initializer=lambda: add_script_run_ctx(threading.current_thread(), ctx)
+                ) as executor:
+                    results = executor.map(partial(_analyze_one, num_posts=num_posts), selected_competitors)
                     
-                    progress_bar.progress((i + 1) / len(selected_competitors))
+                    for i, (username, profile_data, posts_data, hashtags) in enumerate(results):
+                        st.session_state.analyzed_profiles[username] = {
+                            'profile': profile_data,
+                            'posts': posts_data,
+                            'hashtags': hashtags,
+                            'analyzed_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                        }
+                        
+                        progress_bar.progress((i + 1) / len(selected_competitors))
+                
+                # Rebuild the combined posts shared by the dashboard tabs
+                st.session_state.combined_df = build_combined_posts(st.session_state.analyzed_profiles)
                 
                 st.success(f"✅ Analysis completed for {len(selected_competitors)} profiles!")
     
@@ -198,6 +291,12 @@ def display_welcome_screen():
         In a production environment, this would connect to Instagram's API or web scraping services.
         """)
 
+def build_combined_posts(profiles: Dict) -> pd.DataFrame:
+    """Combine the posts of all analyzed profiles into one DataFrame for the tabs."""
+    combined_df = pd.concat([data['posts'] for data in profiles.values()], ignore_index=True)
+    combined_df['username'] = combined_df['username'].astype('category')
+    return combined_df
+
 def display_analytics_dashboard():
     """Display the main analytics dashboard."""
     
@@ -224,28 +323,193 @@ def display_analytics_dashboard():
     with tab5:
         display_posting_patterns_tab(profiles)
 
+def _category_mean(keys: pd.Series, values: pd.Series) -> pd.Series:
+    """Mean of values per observed category of a categorical Series, in one bincount pass."""
+    codes = keys.cat.codes.to_numpy()
+    categories = keys.cat.categories
+    counts = np.bincount(codes, minlength=len(categories))
+    sums = np.bincount(codes, weights=values.to_numpy(np.float64), minlength=len(categories))
+    observed = counts > 0
+    return pd.Series(sums[observed] / counts[observed], index=categories[observed], name=values.name)
+
+def _profiles_key(profiles: Dict) -> tuple:
+    """Return a small hashable key that changes whenever the analyzed profiles change."""
+    return tuple(
+        (username, data['analyzed_at'], len(data['posts']))
+        for username, data in profiles.items()
+    )
+
+# Figure builders are cached on the profiles key; arguments starting with an
+# underscore are not hashed by Streamlit, so the data itself is never rehashed.
+
+@st.cache_data(show_spinner=False, max_entries=FIGURE_CACHE_ENTRIES)
+def _build_overview_figure(profiles_key: tuple, _profile_records: List[Dict]) -> go.Figure:
+    """Build the followers vs engagement rate bubble chart."""
+    size_ref = max(p['posts_count'] for p in _profile_records) / 20 ** 2  # Bubble area scaling of plotly express' size_max=20
+    
+    # One WebGL trace per competitor so each gets its own colour and legend entry
+    fig = go.Figure([
+        go.Scattergl(
+            x=[p['followers']],
+            y=[p['engagement_rate']],
+            mode='markers',
+            name=p['username'],
+            marker=dict(size=[p['posts_count']], sizemode='area', sizeref=size_ref)
+        )
+        for p in _profile_records
+    ])
+    fig.update_layout(
+        title="Followers vs Engagement Rate",
+        xaxis_title='Number of Followers',
+        yaxis_title='Engagement Rate (%)',
+        height=500
+    )
+    return fig
+
+@st.cache_data(show_spinner=False, max_entries=FIGURE_CACHE_ENTRIES)
+def _build_engagement_figures(profiles_key: tuple, _combined_df: pd.DataFrame) -> Tuple[go.Figure, go.Figure, go.Figure]:
+    """Build the engagement trend, likes vs comments and distribution figures."""
+    combined_df = _combined_df
+    
+    # Engagement over time; with at most one post per profile and day the mean is the post itself
+    if combined_df.duplicated(['username', 'date']).any():
+        daily_engagement = combined_df.groupby(['username', 'date'], observed=True)['engagement'].mean()
+    else:
+        daily_engagement = combined_df.set_index(['username', 'date'])['engagement'].sort_index()
+    trend_fig = go.Figure([
+        go.Scatter(
+            x=user_engagement.index.get_level_values('date').to_numpy(),
+            y=user_engagement.to_numpy(),
+            mode='lines',
+            name=username
+        )
+        for username, user_engagement in daily_engagement.groupby(level='username', observed=True)
+    ])
+    trend_fig.update_layout(title="Average Engagement Over Time", xaxis_title='date', yaxis_title='engagement', height=400)
+    
+    # Bound the figure size with a fixed random sample, split evenly between profiles
+    scatter_df = combined_df
+    if len(combined_df) > MAX_SCATTER_POINTS:
+        per_profile = max(1, MAX_SCATTER_POINTS // len(profiles_key))
+        scatter_df = (
+            combined_df.sample(frac=1, random_state=0)
+            .groupby('username', observed=True)
+            .head(per_profile)
+        )
+    scatter_fig = px.scatter(
+        scatter_df,
+        x='likes',
+        y='comments',
+        color='username',
+        title="Likes vs Comments Correlation",
+        render_mode='webgl'
+    )
+    scatter_fig.update_layout(height=400)
+    
+    box_fig = px.box(
+        combined_df,
+        x='username',
+        y='engagement',
+        title="Engagement Distribution by Profile"
+    )
+    box_fig.update_layout(height=400)
+    
+    return trend_fig, scatter_fig, box_fig
+
+@st.cache_data(show_spinner=False, max_entries=FIGURE_CACHE_ENTRIES)
+def _build_content_figures(profiles_key: tuple, _combined_df: pd.DataFrame) -> Tuple[go.Figure, go.Figure, go.Figure]:
+    """Build the content type distribution, performance and per-competitor figures."""
+    combined_df = _combined_df
+    
+    content_dist = combined_df['content_type'].value_counts()
+    dist_fig = go.Figure(go.Pie(labels=content_dist.index.to_numpy(), values=content_dist.to_numpy()))
+    dist_fig.update_layout(title="Content Type Distribution")
+    
+    content_perf = _category_mean(combined_df['content_type'], combined_df['engagement']).sort_values(ascending=True)
+    perf_fig = go.Figure(go.Bar(x=content_perf.to_numpy(), y=content_perf.index.to_numpy(), orientation='h'))
+    perf_fig.update_layout(title="Average Engagement by Content Type")
+    
+    content_by_user = combined_df.groupby(['username', 'content_type'], observed=True).size().unstack(fill_value=0)
+    # Row shares on the dense count matrix, without pandas index alignment
+    counts = content_by_user.to_numpy(np.float64)
+    content_by_user_pct = pd.DataFrame(
+        counts * (100.0 / counts.sum(axis=1, keepdims=True)),
+        index=content_by_user.index,
+        columns=content_by_user.columns
+    )
+    
+    by_user_fig = px.bar(
+        content_by_user_pct,
+        title="Content Type Distribution by Competitor (%)",
+        labels={'value': 'Percentage', 'index': 'Username'}
+    )
+    by_user_fig.update_layout(height=400)
+    
+    return dist_fig, perf_fig, by_user_fig
+
+@st.cache_data(show_spinner=False, max_entries=FIGURE_CACHE_ENTRIES)
+def _build_hashtag_figure(top_hashtags: tuple) -> go.Figure:
+    """Build the top hashtags bar chart."""
+    tags, counts = zip(*top_hashtags)
+    fig = go.Figure(go.Bar(x=np.array(counts), y=np.array(tags), orientation='h'))
+    fig.update_layout(title="Top Hashtags by Usage", height=400)
+    return fig
+
+@st.cache_data(show_spinner=False, max_entries=FIGURE_CACHE_ENTRIES)
+def _build_posting_figures(profiles_key: tuple, _combined_df: pd.DataFrame) -> Tuple[go.Figure, go.Figure, go.Figure]:
+    """Build the posting time and weekly posting frequency figures."""
+    combined_df = _combined_df
+    
+    time_engagement = _category_mean(combined_df['posted_time'], combined_df['engagement']).sort_values(ascending=False)
+    time_fig = go.Figure(go.Bar(x=time_engagement.index.to_numpy(), y=time_engagement.to_numpy()))
+    time_fig.update_layout(title="Average Engagement by Posting Time", height=400)
+    
+    time_dist = combined_df['posted_time'].value_counts()
+    dist_fig = go.Figure(go.Pie(labels=time_dist.index.to_numpy(), values=time_dist.to_numpy()))
+    dist_fig.update_layout(title="When Competitors Post Most")
+    
+    # Add some mock frequency data: one row of 7 daily counts per username, flattened to long form
+    days = np.array(['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun'])
+    usernames = np.array([username for username, _, _ in profiles_key])
+    posts_per_day = np.stack([_username_rng(username).integers(0, 5, len(days)) for username in usernames])
+    
+    freq_df = pd.DataFrame({
+        'Username': np.repeat(usernames, len(days)),
+        'Day': np.tile(days, len(usernames)),
+        'Posts': posts_per_day.ravel()
+    })
+    
+    freq_fig = px.bar(
+        freq_df,
+        x='Day',
+        y='Posts',
+        color='Username',
+        title="Weekly Posting Frequency",
+        barmode='group'
+    )
+    freq_fig.update_layout(height=400)
+    
+    return time_fig, dist_fig, freq_fig
+
 def display_overview_tab(profiles: Dict):
     """Display overview metrics and comparisons."""
     
     st.header("📊 Competitor Overview")
     
-    # Create summary dataframe
-    summary_data = []
-    for username, data in profiles.items():
-        profile = data['profile']
-        posts_df = data['posts']
-        
-        summary_data.append({
-            'Username': f"@{username}",
-            'Followers': f"{profile['followers']:,}",
-            'Following': f"{profile['following']:,}",
-            'Posts': f"{profile['posts_count']:,}",
-            'Avg Engagement': f"{posts_df['engagement'].mean():.0f}",
-            'Engagement Rate': f"{profile['engagement_rate']:.1f}%",
-            'Verified': '✅' if profile['verified'] else '❌'
-        })
-    
-    summary_df = pd.DataFrame(summary_data)
+    # Summary rows from the profile aggregates computed at analysis time
+    profile_records = [data['profile'] for data in profiles.values()]
+    summary_data = [
+        {
+            'Username': f"@{p['username']}",
+            'Followers': p['followers'],
+            'Following': p['following'],
+            'Posts': p['posts_count'],
+            'Avg Engagement': p['avg_engagement'],
+            'Engagement Rate': p['engagement_rate'],
+            'Verified': '✅' if p['verified'] else '❌'
+        }
+        for p in profile_records
+    ]
     
     # Display metrics cards
     cols = st.columns(len(profiles))
@@ -259,34 +523,22 @@ def display_overview_tab(profiles: Dict):
             )
     
     st.markdown("### 📋 Detailed Comparison")
-    st.dataframe(summary_df, use_container_width=True)
+    st.dataframe(
+        summary_data,
+        use_container_width=True,
+        column_config={
+            'Followers': st.column_config.NumberColumn(format='localized'),
+            'Following': st.column_config.NumberColumn(format='localized'),
+            'Posts': st.column_config.NumberColumn(format='localized'),
+            'Avg Engagement': st.column_config.NumberColumn(format='%.0f'),
+            'Engagement Rate': st.column_config.NumberColumn(format='%.1f%%')
+        }
+    )
     
     # Visualization: Followers vs Engagement Rate
     st.markdown("### 📈 Followers vs Engagement Rate")
     
-    plot_data = []
-    for username, data in profiles.items():
-        profile = data['profile']
-        plot_data.append({
-            'Username': username,
-            'Followers': profile['followers'],
-            'Engagement Rate': profile['engagement_rate'],
-            'Posts Count': profile['posts_count']
-        })
-    
-    plot_df = pd.DataFrame(plot_data)
-    
-    fig = px.scatter(
-        plot_df, 
-        x='Followers', 
-        y='Engagement Rate',
-        size='Posts Count',
-        color='Username',
-        hover_name='Username',
-        title="Followers vs Engagement Rate",
-        labels={'Followers': 'Number of Followers', 'Engagement Rate': 'Engagement Rate (%)'}
-    )
-    fig.update_layout(height=500)
+    fig = _build_overview_figure(_profiles_key(profiles), profile_records)
     st.plotly_chart(fig, use_container_width=True)
 
 def display_engagement_tab(profiles: Dict):
@@ -294,126 +546,63 @@ def display_engagement_tab(profiles: Dict):
     
     st.header("📈 Engagement Analysis")
     
-    # Combine all posts data
-    all_posts = []
-    for username, data in profiles.items():
-        posts_df = data['posts'].copy()
-        all_posts.append(posts_df)
-    
-    combined_df = pd.concat(all_posts, ignore_index=True)
-    combined_df['date'] = pd.to_datetime(combined_df['date'])
+    # Posts of all profiles, combined once per analysis
+    combined_df = st.session_state.combined_df
+    trend_fig, scatter_fig, box_fig = _build_engagement_figures(_profiles_key(profiles), combined_df)
     
     # Engagement over time
     st.subheader("📅 Engagement Trends Over Time")
-    
-    fig = px.line(
-        combined_df.groupby(['username', 'date'])['engagement'].mean().reset_index(),
-        x='date',
-        y='engagement',
-        color='username',
-        title="Average Engagement Over Time"
-    )
-    fig.update_layout(height=400)
-    st.plotly_chart(fig, use_container_width=True)
+    st.plotly_chart(trend_fig, use_container_width=True)
     
     # Engagement distribution
     col1, col2 = st.columns(2)
     
     with col1:
         st.subheader("💬 Likes vs Comments")
-        fig = px.scatter(
-            combined_df,
-            x='likes',
-            y='comments',
-            color='username',
-            title="Likes vs Comments Correlation"
-        )
-        fig.update_layout(height=400)
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(scatter_fig, use_container_width=True)
     
     with col2:
         st.subheader("📊 Engagement Distribution")
-        fig = px.box(
-            combined_df,
-            x='username',
-            y='engagement',
-            title="Engagement Distribution by Profile"
-        )
-        fig.update_layout(height=400)
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(box_fig, use_container_width=True)
 
 def display_content_tab(profiles: Dict):
     """Display content type analysis."""
     
     st.header("📱 Content Type Analysis")
     
-    # Combine all posts data
-    all_posts = []
-    for username, data in profiles.items():
-        posts_df = data['posts'].copy()
-        all_posts.append(posts_df)
-    
-    combined_df = pd.concat(all_posts, ignore_index=True)
+    # Posts of all profiles, combined once per analysis
+    combined_df = st.session_state.combined_df
+    dist_fig, perf_fig, by_user_fig = _build_content_figures(_profiles_key(profiles), combined_df)
     
     # Content type performance
     col1, col2 = st.columns(2)
     
     with col1:
         st.subheader("📊 Content Type Distribution")
-        content_dist = combined_df['content_type'].value_counts()
-        fig = px.pie(
-            values=content_dist.values,
-            names=content_dist.index,
-            title="Content Type Distribution"
-        )
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(dist_fig, use_container_width=True)
     
     with col2:
         st.subheader("🎯 Content Type Performance")
-        content_perf = combined_df.groupby('content_type')['engagement'].mean().sort_values(ascending=True)
-        fig = px.bar(
-            x=content_perf.values,
-            y=content_perf.index,
-            orientation='h',
-            title="Average Engagement by Content Type"
-        )
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(perf_fig, use_container_width=True)
     
     # Content type by username
     st.subheader("👥 Content Strategy by Competitor")
-    
-    content_by_user = combined_df.groupby(['username', 'content_type']).size().unstack(fill_value=0)
-    content_by_user_pct = content_by_user.div(content_by_user.sum(axis=1), axis=0) * 100
-    
-    fig = px.bar(
-        content_by_user_pct,
-        title="Content Type Distribution by Competitor (%)",
-        labels={'value': 'Percentage', 'index': 'Username'}
-    )
-    fig.update_layout(height=400)
-    st.plotly_chart(fig, use_container_width=True)
+    st.plotly_chart(by_user_fig, use_container_width=True)
 
 def display_hashtag_tab(profiles: Dict):
     """Display hashtag analysis."""
     
     st.header("#️⃣ Hashtag Analysis")
     
-    # Collect all hashtags
-    all_hashtags = {}
-    for username, data in profiles.items():
-        hashtags = data['hashtags']
-        for hashtag in hashtags:
-            if hashtag not in all_hashtags:
-                all_hashtags[hashtag] = []
-            all_hashtags[hashtag].append(username)
+    # Count how many competitors use each hashtag
+    hashtag_counts = Counter(tag for data in profiles.values() for tag in data['hashtags'])
     
     # Popular hashtags
     col1, col2 = st.columns(2)
     
     with col1:
         st.subheader("🔥 Most Popular Hashtags")
-        hashtag_counts = {tag: len(users) for tag, users in all_hashtags.items()}
-        sorted_hashtags = sorted(hashtag_counts.items(), key=lambda x: x[1], reverse=True)[:10]
+        sorted_hashtags = hashtag_counts.most_common(10)
         
         hashtag_df = pd.DataFrame(sorted_hashtags, columns=['Hashtag', 'Used by # Competitors'])
         st.dataframe(hashtag_df, use_container_width=True)
@@ -421,14 +610,7 @@ def display_hashtag_tab(profiles: Dict):
     with col2:
         st.subheader("📊 Hashtag Usage Distribution")
         if sorted_hashtags:
-            tags, counts = zip(*sorted_hashtags[:8])
-            fig = px.bar(
-                x=list(counts),
-                y=list(tags),
-                orientation='h',
-                title="Top Hashtags by Usage"
-            )
-            fig.update_layout(height=400)
+            fig = _build_hashtag_figure(tuple(sorted_hashtags[:8]))
             st.plotly_chart(fig, use_container_width=True)
     
     # Hashtags by competitor
@@ -445,66 +627,24 @@ def display_posting_patterns_tab(profiles: Dict):
     
     st.header("📅 Posting Pattern Analysis")
     
-    # Combine all posts data
-    all_posts = []
-    for username, data in profiles.items():
-        posts_df = data['posts'].copy()
-        all_posts.append(posts_df)
-    
-    combined_df = pd.concat(all_posts, ignore_index=True)
+    # Posts of all profiles, combined once per analysis
+    combined_df = st.session_state.combined_df
+    time_fig, dist_fig, freq_fig = _build_posting_figures(_profiles_key(profiles), combined_df)
     
     # Posting time analysis
     col1, col2 = st.columns(2)
     
     with col1:
         st.subheader("🕐 Best Posting Times")
-        time_engagement = combined_df.groupby('posted_time')['engagement'].mean().sort_values(ascending=False)
-        
-        fig = px.bar(
-            x=time_engagement.index,
-            y=time_engagement.values,
-            title="Average Engagement by Posting Time"
-        )
-        fig.update_layout(height=400)
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(time_fig, use_container_width=True)
     
     with col2:
         st.subheader("📊 Posting Time Distribution")
-        time_dist = combined_df['posted_time'].value_counts()
-        
-        fig = px.pie(
-            values=time_dist.values,
-            names=time_dist.index,
-            title="When Competitors Post Most"
-        )
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(dist_fig, use_container_width=True)
     
     # Weekly posting frequency
     st.subheader("📈 Posting Frequency by Competitor")
-    
-    # Add some mock frequency data
-    frequency_data = []
-    for username in profiles.keys():
-        np.random.seed(hash(username) % 2**32)
-        for day in ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']:
-            frequency_data.append({
-                'Username': username,
-                'Day': day,
-                'Posts': np.random.randint(0, 5)
-            })
-    
-    freq_df = pd.DataFrame(frequency_data)
-    
-    fig = px.bar(
-        freq_df,
-        x='Day',
-        y='Posts',
-        color='Username',
-        title="Weekly Posting Frequency",
-        barmode='group'
-    )
-    fig.update_layout(height=400)
-    st.plotly_chart(fig, use_container_width=True)
+    st.plotly_chart(freq_fig, use_container_width=True)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file